@@ -19,7 +19,7 @@ def load_grid_cells_synthetic(
     field_width,
     resolution,
 ):
-    grids = generate_all_grids(
+    grids, _ = generate_all_grids(
         grid_scale, arena_dims, n_cells, grid_orientation_mean, grid_orientation_std
     )
     rate_maps = create_rate_maps(grids, field_width, arena_dims, resolution)
@@ -197,6 +197,28 @@ def compute_curvature_true(config, n_grid_points=2000):
     return z_grid, geodesic_dist, curv, curv_norm
 
 
+def compute_velocity_stats(z_grid, angles, velocities, window=0.2):
+    """Compute the statistics of the velocities around each point of the grid.
+
+    The velocities are those of the labels whose positional angle, in degrees,
+    is within window rad of the grid point, on the circle. Grid points without
+    such labels get nan statistics, and -1 as min and max velocities.
+    """
+    angles = np.deg2rad(np.asarray(angles))
+    diffs = angles[None, :] - np.asarray(z_grid)[:, None]
+    is_close = np.abs(np.arctan2(np.sin(diffs), np.cos(diffs))) < window
+    is_empty = ~is_close.any(axis=1)
+    velocities = np.where(is_close, np.asarray(velocities)[None, :], np.nan)
+
+    return {
+        "mean_velocities": np.nanmean(velocities, axis=1),
+        "median_velocities": np.nanmedian(velocities, axis=1),
+        "std_velocities": np.nanstd(velocities, axis=1),
+        "min_velocities": np.where(is_empty, -1, np.nanmin(velocities, axis=1)),
+        "max_velocities": np.where(is_empty, -1, np.nanmax(velocities, axis=1)),
+    }
+
+
 def _compute_curvature_error_s1(thetas, curv_norms_learned, curv_norms_true):
     """Compute "error" of learned curvature profile given true profile for S1."""
     curv_norms_learned = np.array(curv_norms_learned)
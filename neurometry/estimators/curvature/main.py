@@ -1,23 +1,22 @@
 """Main script."""
 
-import itertools
 import json
 import logging
 import os
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
 # from ray.tune.integration.wandb import wandb_mixin
 import torch
 import wandb
 from ray import air, tune
+from ray.train import report
 from ray.tune.schedulers import AsyncHyperBandScheduler
-from ray.tune.search.hyperopt import HyperOptSearch
 
 import neurometry.curvature.datasets.utils as utils
 import neurometry.curvature.default_config as default_config
@@ -39,51 +38,39 @@ def main():
 
     This launches experiments with wandb with different config parameters.
 
-    For each set of experiment parameters:
-    - it runs a ray tune sweep that optimize on the hyperparameters.
+    For each dataset:
+    - it runs a single ray tune sweep that grid-searches over the experiment
+    parameters and optimizes on the hyperparameters, so that the different
+    experiments are scheduled in parallel by ray.
     """
+    # Grid-searched experiment parameters, read once from default_config:
+    experimental_grid = {
+        "expt_id": default_config.expt_id,
+        "timestep_microsec": default_config.timestep_microsec,
+        "smooth": default_config.smooth,
+        "select_gain_1": default_config.select_gain_1,
+    }
+    synthetic_grid = {
+        "n_times": default_config.n_times,
+        "embedding_dim": default_config.embedding_dim,
+        "geodesic_distortion_amp": default_config.geodesic_distortion_amp,
+        "noise_var": default_config.noise_var,
+    }
+    grid_cells_grid = {
+        "grid_scale": default_config.grid_scale,
+        "arena_dims": default_config.arena_dims,
+        "n_cells": default_config.n_cells,
+        "grid_orientation_mean": default_config.grid_orientation_mean,
+        "grid_orientation_std": default_config.grid_orientation_std,
+        "field_width": default_config.field_width,
+        "resolution": default_config.resolution,
+    }
+
     for dataset_name in default_config.dataset_name:
         if dataset_name == "experimental":
-            # Variable experiments parameters (experimental datasets):
-            for (
-                expt_id,
-                timestep_microsec,
-                smooth,
-                select_gain_1,
-            ) in itertools.product(
-                default_config.expt_id,
-                default_config.timestep_microsec,
-                default_config.smooth,
-                default_config.select_gain_1,
-            ):
-                sweep_name = f"{dataset_name}_{expt_id}"
-                if select_gain_1:
-                    sweep_name += "_gain_1"
-                else:
-                    sweep_name += "_other_gain"
-
-                logging.info(f"\n---> START training for ray sweep: {sweep_name}.")
-                main_sweep(
-                    sweep_name=sweep_name,
-                    dataset_name=dataset_name,
-                    expt_id=expt_id,
-                    timestep_microsec=timestep_microsec,
-                    smooth=smooth,
-                    select_gain_1=select_gain_1,
-                )
+            experiment_grid = experimental_grid
         elif dataset_name in ["s1_synthetic", "s2_synthetic", "t2_synthetic"]:
-            # Variable experiments parameters (synthetic datasets):
-            for (
-                n_times,
-                embedding_dim,
-                geodesic_distortion_amp,
-                noise_var,
-            ) in itertools.product(
-                default_config.n_times,
-                default_config.embedding_dim,
-                default_config.geodesic_distortion_amp,
-                default_config.noise_var,
-            ):
+            for embedding_dim in synthetic_grid["embedding_dim"]:
                 if (
                     dataset_name in ["s2_synthetic", "t2_synthetic"]
                     and embedding_dim <= 2
@@ -91,61 +78,50 @@ def main():
                     raise ValueError(
                         f"Manifold cannot be embedded in {embedding_dim} dimensions"
                     )
-                    continue
-                sweep_name = f"{dataset_name}_noise_var_{noise_var}"
-                sweep_name += f"_embedding_dim_{embedding_dim}"
-                logging.info(f"\n---> START training for ray sweep: {sweep_name}.")
-                main_sweep(
-                    sweep_name=sweep_name,
-                    dataset_name=dataset_name,
-                    n_times=n_times,
-                    embedding_dim=embedding_dim,
-                    geodesic_distortion_amp=geodesic_distortion_amp,
-                    noise_var=noise_var,
-                )
+            experiment_grid = synthetic_grid
         elif dataset_name == "grid_cells":
-            for (
-                grid_scale,
-                arena_dims,
-                n_cells,
-                grid_orientation_mean,
-                grid_orientation_std,
-                field_width,
-                resolution,
-            ) in itertools.product(
-                default_config.grid_scale,
-                default_config.arena_dims,
-                default_config.n_cells,
-                default_config.grid_orientation_mean,
-                default_config.grid_orientation_std,
-                default_config.field_width,
-                default_config.resolution,
-            ):
-                sweep_name = f"{dataset_name}_orientation_std_{grid_orientation_std}"
-                sweep_name += f"_ncells_{n_cells}"
-                logging.info(f"\n---> START training for ray sweep: {sweep_name}.")
-                main_sweep(
-                    sweep_name=sweep_name,
-                    dataset_name=dataset_name,
-                    grid_scale=grid_scale,
-                    arena_dims=arena_dims,
-                    n_cells=n_cells,
-                    grid_orientation_mean=grid_orientation_mean,
-                    grid_orientation_std=grid_orientation_std,
-                    field_width=field_width,
-                    resolution=resolution,
-                )
+            experiment_grid = grid_cells_grid
         elif dataset_name == "three_place_cells_synthetic":
-            sweep_name = f"{dataset_name}"
-            logging.info(f"\n---> START training for ray sweep: {sweep_name}.")
-            main_sweep(
-                sweep_name=sweep_name,
-                dataset_name=dataset_name,
-            )
+            experiment_grid = {}
+        else:
+            continue
+
+        logging.info(f"\n---> START training for ray sweep: {dataset_name}.")
+        main_sweep(dataset_name=dataset_name, **experiment_grid)
+
+
+def get_sweep_name(dataset_name, config):
+    """Get the name of the sweep corresponding to one set of experiment parameters.
+
+    Parameters
+    ----------
+    dataset_name : str
+        Name of the dataset.
+    config : dict
+        Configuration of the run, with the experiment parameters resolved.
+
+    Returns
+    -------
+    sweep_name : str
+        Name of the sweep that the run belongs to.
+    """
+    sweep_name = f"{dataset_name}"
+    if dataset_name == "experimental":
+        sweep_name += f"_{config['expt_id']}"
+        if config["select_gain_1"]:
+            sweep_name += "_gain_1"
+        else:
+            sweep_name += "_other_gain"
+    elif dataset_name in ["s1_synthetic", "s2_synthetic", "t2_synthetic"]:
+        sweep_name += f"_noise_var_{config['noise_var']}"
+        sweep_name += f"_embedding_dim_{config['embedding_dim']}"
+    elif dataset_name == "grid_cells":
+        sweep_name += f"_orientation_std_{config['grid_orientation_std']}"
+        sweep_name += f"_ncells_{config['n_cells']}"
+    return sweep_name
 
 
 def main_sweep(
-    sweep_name,
     dataset_name,
     expt_id=None,
     timestep_microsec=None,
@@ -163,49 +139,33 @@ def main_sweep(
     field_width=None,
     resolution=None,
 ):
-    """Run a single experiment, possibly with a ray tune sweep.
+    """Run all experiments of a dataset in a single ray tune sweep.
+
+    The experiment parameters are grid-searched, while the hyperparameters
+    are sampled, so that ray schedules all runs in parallel.
 
     Parameters
     ----------
-    sweep_name : str
-        Name of the sweep that will launches several runs.
     dataset_name : str
         Name of the dataset.
-    expt_id : str (optional, only for experimental)
-        ID of the experiment.
-    timestep_microsec : float (optional, only for experimental)
-        Timestep of the experiment.
-    smooth : bool (optional, only for experimental)
+    expt_id : list of str (optional, only for experimental)
+        IDs of the experiments.
+    timestep_microsec : list of float (optional, only for experimental)
+        Timesteps of the experiment.
+    smooth : list of bool (optional, only for experimental)
         Whether to smooth the data or not.
-    select_gain_1 : bool (optional, only for experimental)
+    select_gain_1 : list of bool (optional, only for experimental)
         Whether to select the first gain or not.
-    n_times : int (optional, only for synthetic)
+    n_times : list of int (optional, only for synthetic)
         Number of times.
-    embedding_dim : int (optional, only for synthetic)
-        Dimension of the embedding space.
-    geodesic_distortion_amp : float (optional, only for synthetic)
-        Amplitude of the distortion.
-    noise_var : float (optional, only for synthetic)
-        Variance of the noise.
+    embedding_dim : list of int (optional, only for synthetic)
+        Dimensions of the embedding space.
+    geodesic_distortion_amp : list of float (optional, only for synthetic)
+        Amplitudes of the distortion.
+    noise_var : list of float (optional, only for synthetic)
+        Variances of the noise.
     """
-    sweep_config = {
-        # "lr": tune.loguniform(default_config.lr_min, default_config.lr_max),
-        "lr": tune.choice(default_config.lr_min),
-        "batch_size": tune.choice(default_config.batch_size),
-        "encoder_width": tune.choice(default_config.encoder_width),
-        "encoder_depth": tune.choice(default_config.encoder_depth),
-        "decoder_width": tune.choice(default_config.decoder_width),
-        "decoder_depth": tune.choice(default_config.decoder_depth),
-        "drop_out_p": tune.choice(default_config.drop_out_p),
-        "wandb": {
-            "api_key": default_config.api_key,
-        },
-    }
-
-    fixed_config = {
-        # Parameters constant across runs of the sweep (unique value):
-        "dataset_name": dataset_name,
-        "sweep_name": sweep_name,
+    experiment_config = {
         "expt_id": expt_id,
         "timestep_microsec": timestep_microsec,
         "smooth": smooth,
@@ -221,8 +181,34 @@ def main_sweep(
         "grid_orientation_std": grid_orientation_std,
         "field_width": field_width,
         "resolution": resolution,
-        # Parameters fixed across runs and sweeps
+    }
+
+    sweep_config = {
+        # "lr": tune.loguniform(default_config.lr_min, default_config.lr_max),
+        "lr": tune.choice(default_config.lr_min),
+        "batch_size": tune.choice(default_config.batch_size),
+        "encoder_width": tune.choice(default_config.encoder_width),
+        "encoder_depth": tune.choice(default_config.encoder_depth),
+        "decoder_width": tune.choice(default_config.decoder_width),
+        "decoder_depth": tune.choice(default_config.decoder_depth),
+        "drop_out_p": tune.choice(default_config.drop_out_p),
+        "wandb": {
+            "api_key": default_config.api_key,
+        },
+        "sweep_name": tune.sample_from(
+            lambda spec: get_sweep_name(dataset_name, spec.config)
+        ),
+    }
+    # Parameters varying across experiments (grid over their values):
+    for param_name, param_values in experiment_config.items():
+        sweep_config[param_name] = (
+            None if param_values is None else tune.grid_search(param_values)
+        )
+
+    fixed_config = {
+        # Parameters fixed across runs of the sweep
         # (unique value depending on dataset_name):
+        "dataset_name": dataset_name,
         "manifold_dim": default_config.manifold_dim[dataset_name],
         "latent_dim": default_config.latent_dim[dataset_name],
         "posterior_type": default_config.posterior_type[dataset_name],
@@ -253,6 +239,7 @@ def main_sweep(
 
     # @wandb_mixin
     def main_run(sweep_config):
+        sweep_name = sweep_config["sweep_name"]
         wandb.init(project="topo-vae", entity="bioshape-lab")
         wandb_config = wandb.config
         wandb_config.update(fixed_config)
@@ -278,10 +265,18 @@ def main_sweep(
         with open(wandb_config_path, "w") as config_file:
             json.dump(dict(wandb_config), config_file)
 
-        # Note: loaders put data on GPU during each epoch
-        dataset = dataset.to(wandb_config.device)
+        def report_epoch(epoch, test_loss):
+            # Report metrics to the ray tune sweep at each epoch,
+            # so that the scheduler can stop weak trials early.
+            # The last epoch is reported once the run is logged, since the
+            # scheduler stops the trial when it reaches max_t = n_epochs.
+            if epoch < wandb_config.n_epochs:
+                report({"test_loss": test_loss, "epoch": epoch})
+
+        # Note: loaders put data on GPU during each epoch,
+        # the dataset itself stays on CPU during training.
         train_losses, test_losses, model = create_model_and_train_test(
-            wandb_config, train_loader, test_loader
+            wandb_config, train_loader, test_loader, epoch_callback=report_epoch
         )
         logging.info(f"Done: training for {run_name}")
 
@@ -297,37 +292,38 @@ def main_sweep(
         # Wandb records a run as finished even if it has failed.
         wandb.finish()
 
-        # Returns metrics to log into ray tune sweep
-        return {"test_loss": np.min(test_losses)}
-
-    sweep_search = HyperOptSearch(metric=default_config.sweep_metric, mode="min")
+        # The lowest test loss is reported, as the logged model is the best one.
+        report({"test_loss": min(test_losses), "epoch": len(test_losses)})
 
+    # Stop weak trials early: only the top 1/reduction_factor
+    # of the trials are promoted at each rung, starting after grace_period.
     sweep_scheduler = AsyncHyperBandScheduler(
         time_attr="training_iteration",
         metric=default_config.sweep_metric,
-        brackets=1,
-        reduction_factor=8,
         mode="min",
+        max_t=default_config.n_epochs,
+        grace_period=max(1, default_config.n_epochs // 16),
+        reduction_factor=3,
+        brackets=3,
     )
 
     tuner = tune.Tuner(
         trainable=tune.with_resources(main_run, {"cpu": 4, "gpu": 1}),
         param_space=sweep_config,
         tune_config=tune.TuneConfig(
-            search_alg=sweep_search,
             scheduler=sweep_scheduler,
             num_samples=default_config.num_samples,
         ),
         run_config=air.RunConfig(
-            name=sweep_name, local_dir=default_config.ray_sweep_dir
+            name=dataset_name, local_dir=default_config.ray_sweep_dir
         ),
     )
     tuner.fit()
 
-    logging.info(f"\n------> COMPLETED RAY SWEEP: {sweep_name}.\n")
+    logging.info(f"\n------> COMPLETED RAY SWEEP: {dataset_name}.\n")
 
 
-def create_model_and_train_test(config, train_loader, test_loader):
+def create_model_and_train_test(config, train_loader, test_loader, epoch_callback=None):
     """Create model and train and test it.
 
     Note: train_loader and test_loader have a dataset attribute.
@@ -336,14 +332,20 @@ def create_model_and_train_test(config, train_loader, test_loader):
 
     The data_point variable is a tensor of shape (embedding_dim,)
     corresponding to a single data point.
+
+    If given, epoch_callback is called as epoch_callback(epoch, test_loss)
+    at the end of each epoch.
     """
     data_dim = next(iter(train_loader.dataset[0][0].data.shape))
+    random.seed(0)
+    torch.manual_seed(0)
+    if torch.cuda.is_available():
+        torch.cuda.manual_seed_all(0)
+    # Input shapes are fixed within a sweep: let cuDNN pick the fastest kernels
+    torch.backends.cudnn.benchmark = True
+
     # Create model
     if config.posterior_type in ("gaussian", "hyperspherical"):
-        random.seed(0)
-        torch.manual_seed(0)
-        if torch.cuda.is_available():
-            torch.cuda.manual_seed_all(0)
         model = neural_vae.NeuralVAE(
             data_dim=data_dim,
             latent_dim=config.latent_dim,
@@ -356,10 +358,6 @@ def create_model_and_train_test(config, train_loader, test_loader):
             drop_out_p=config.drop_out_p,
         ).to(config.device)
     elif config.posterior_type == "toroidal":
-        random.seed(0)
-        torch.manual_seed(0)
-        if torch.cuda.is_available():
-            torch.cuda.manual_seed_all(0)
         model = toroidal_vae.ToroidalVAE(
             data_dim=data_dim,
             latent_dim=config.latent_dim,
@@ -371,10 +369,6 @@ def create_model_and_train_test(config, train_loader, test_loader):
             posterior_type=config.posterior_type,
         ).to(config.device)
     elif config.posterior_type == "klein_bottle":
-        random.seed(0)
-        torch.manual_seed(0)
-        if torch.cuda.is_available():
-            torch.cuda.manual_seed_all(0)
         model = klein_bottle_vae.KleinBottleVAE(
             data_dim=data_dim,
             latent_dim=config.latent_dim,
@@ -386,6 +380,11 @@ def create_model_and_train_test(config, train_loader, test_loader):
             posterior_type=config.posterior_type,
         ).to(config.device)
 
+    # Compile model in place to fuse the ops of the encoder and decoder, on GPU
+    # only: graph breaks are allowed for the data-dependent posterior sampling.
+    if torch.device(config.device).type == "cuda" and hasattr(model, "compile"):
+        model.compile(mode="reduce-overhead", fullgraph=False)
+
     # Create optimizer, scheduler
     optimizer = torch.optim.Adam(model.parameters(), lr=config.lr, amsgrad=True)
     scheduler = None
@@ -402,25 +401,49 @@ def create_model_and_train_test(config, train_loader, test_loader):
         optimizer=optimizer,
         scheduler=scheduler,
         config=config,
+        epoch_callback=epoch_callback,
     )
     return train_losses, test_losses, best_model
 
 
+def figures_to_wandb_images(figs):
+    """Convert matplotlib figures to wandb images in parallel threads.
+
+    The figures are independent of each other, and each is drawn on its own
+    Agg canvas. Note: this relies on matplotlib's per-thread font caches
+    (matplotlib >= 3.6) to draw them from several threads.
+
+    Parameters
+    ----------
+    figs : dict
+        Matplotlib figures, indexed by their wandb key.
+
+    Returns
+    -------
+    images : dict
+        Wandb images, indexed by the same keys.
+    """
+    with ThreadPoolExecutor(max_workers=len(figs)) as executor:
+        images = list(executor.map(wandb.Image, figs.values()))
+    return dict(zip(figs, images, strict=True))
+
+
 def training_plot_log(config, dataset, labels, train_losses, test_losses, model):
     """Plot and log training results."""
     # Plot
     fig_loss = viz.plot_loss(train_losses, test_losses, config)
-    fig_latent = viz.plot_latent_space(model, dataset, labels, config)
-    fig_recon_per_angle = viz.plot_recon_per_positional_angle(
-        model, dataset, labels, config
-    )
-    fig_recon_per_time = viz.plot_recon_per_time(model, dataset, labels, config)
+    # No gradients are needed to plot the model's outputs on the dataset
+    with torch.inference_mode():
+        dataset = dataset.to(config.device)
+        fig_latent = viz.plot_latent_space(model, dataset, labels, config)
+        fig_recon_per_angle = viz.plot_recon_per_positional_angle(
+            model, dataset, labels, config
+        )
+        fig_recon_per_time = viz.plot_recon_per_time(model, dataset, labels, config)
 
     # Log
-    model_path = os.path.join(
-        default_config.trained_models_dir, f"{config.results_prefix}_model.pt"
-    )
-    torch.save(model, model_path)
+    # Note: only the state dict is saved, to reload a model, instantiate
+    # its class with the run's config and call load_state_dict.
     model_state_dict_path = os.path.join(
         default_config.trained_models_dir,
         f"{config.results_prefix}_model_state_dict.pth",
@@ -428,12 +451,14 @@ def training_plot_log(config, dataset, labels, train_losses, test_losses, model)
     state = {"state_dict": model.state_dict()}
     torch.save(state, model_state_dict_path)
     wandb.log(
-        {
-            "fig_loss": wandb.Image(fig_loss),
-            "fig_latent": wandb.Image(fig_latent),
-            "fig_recon": wandb.Image(fig_recon_per_angle),
-            "fig_recon_per_time": wandb.Image(fig_recon_per_time),
-        }
+        figures_to_wandb_images(
+            {
+                "fig_loss": fig_loss,
+                "fig_latent": fig_latent,
+                "fig_recon": fig_recon_per_angle,
+                "fig_recon_per_time": fig_recon_per_time,
+            }
+        )
     )
     plt.close("all")
 
@@ -443,6 +468,8 @@ def curvature_compute_plot_log(config, dataset, labels, model):
     # Compute
     print("Computing learned curvature...")
     start_time = time.time()
+    # Note: this cannot run in inference mode, as the mean curvature
+    # is computed with autograd through the decoder.
     z_grid, geodesic_dist, _, curv_norms_learned = evaluate.compute_curvature_learned(
         model=model,
         config=config,
@@ -450,56 +477,48 @@ def curvature_compute_plot_log(config, dataset, labels, model):
         n_grid_points=config.n_grid_points,
     )
 
-    curv_norm_learned_profile = pd.DataFrame(
-        {
-            "geodesic_dist": geodesic_dist,
-            "curv_norm_learned": curv_norms_learned,
-        }
-    )
+    curv_norm_learned_profile = {
+        "geodesic_dist": np.asarray(geodesic_dist),
+        "curv_norm_learned": np.asarray(curv_norms_learned),
+    }
     if config.dataset_name in (
         "s1_synthetic",
         "experimental",
         "three_place_cells_synthetic",
     ):
-        curv_norm_learned_profile["z_grid"] = z_grid
+        curv_norm_learned_profile["z_grid"] = np.asarray(z_grid)
     elif config.dataset_name in ("s2_synthetic", "t2_synthetic", "grid_cells"):
-        curv_norm_learned_profile["z_grid_theta"] = z_grid[:, 0]
-        curv_norm_learned_profile["z_grid_phi"] = z_grid[:, 1]
+        curv_norm_learned_profile["z_grid_theta"] = np.asarray(z_grid[:, 0])
+        curv_norm_learned_profile["z_grid_phi"] = np.asarray(z_grid[:, 1])
 
     if config.dataset_name == "experimental":
-        mean_velocities = []
-        median_velocities = []
-        std_velocities = []
-        min_velocities = []
-        max_velocities = []
-        for one_z_grid in curv_norm_learned_profile["z_grid"]:
-            selected_labels = labels[
-                np.abs((one_z_grid - labels["angles"]) % 2 * np.pi) < 0.2
-            ]
-            mean_velocities.append(np.nanmean(selected_labels["velocities"]))
-            median_velocities.append(np.nanmedian(selected_labels["velocities"]))
-            std_velocities.append(np.nanstd(selected_labels["velocities"]))
-            if len(selected_labels) == 0:
-                min_velocities.append(-1)
-                max_velocities.append(-1)
-            else:
-                min_velocities.append(np.nanmin(selected_labels["velocities"]))
-                max_velocities.append(np.nanmax(selected_labels["velocities"]))
-
-        curv_norm_learned_profile["mean_velocities"] = mean_velocities
-        curv_norm_learned_profile["median_velocities"] = median_velocities
-        curv_norm_learned_profile["std_velocities"] = std_velocities
-        curv_norm_learned_profile["min_velocities"] = min_velocities
-        curv_norm_learned_profile["max_velocities"] = max_velocities
+        curv_norm_learned_profile.update(
+            evaluate.compute_velocity_stats(
+                z_grid, labels["angles"].to_numpy(), labels["velocities"].to_numpy()
+            )
+        )
 
     print("Logging learned curvature...")
-    curv_norm_learned_profile.to_csv(
+    curv_norm_learned_columns = list(curv_norm_learned_profile)
+    curv_norm_learned_data = np.column_stack(list(curv_norm_learned_profile.values()))
+    np.savetxt(
         os.path.join(
             default_config.curvature_profiles_dir,
             f"{config.results_prefix}_curv_norm_learned_profile.csv",
-        )
+        ),
+        curv_norm_learned_data,
+        delimiter=",",
+        header=",".join(curv_norm_learned_columns),
+        comments="",
+    )
+    wandb.log(
+        {
+            "curv_norm_learned_profile": wandb.Table(
+                columns=curv_norm_learned_columns,
+                data=curv_norm_learned_data.tolist(),
+            )
+        }
     )
-    wandb.log({"curv_norm_learned_profile": curv_norm_learned_profile})
 
     comp_time_learned = time.time() - start_time
 
@@ -516,26 +535,27 @@ def curvature_compute_plot_log(config, dataset, labels, model):
         curvature_error = evaluate.compute_curvature_error(
             z_grid, curv_norms_learned, curv_norms_true, config
         )
-        norm_val = max(curv_norms_true)
-
-        curv_norm_true_profile = pd.DataFrame(
-            {
-                "geodesic_dist": geodesic_dist,
-                "curv_norm_true": curv_norms_true,
-            }
-        )
+        curv_norm_true_profile = {
+            "geodesic_dist": np.asarray(geodesic_dist),
+            "curv_norm_true": np.asarray(curv_norms_true),
+        }
+        norm_val = float(np.nanmax(curv_norm_true_profile["curv_norm_true"]))
 
         if config.dataset_name == "s1_synthetic":
-            curv_norm_true_profile["z_grid"] = z_grid
+            curv_norm_true_profile["z_grid"] = np.asarray(z_grid)
         else:
-            curv_norm_true_profile["z_grid_theta"] = z_grid[:, 0]
-            curv_norm_true_profile["z_grid_phi"] = z_grid[:, 1]
+            curv_norm_true_profile["z_grid_theta"] = np.asarray(z_grid[:, 0])
+            curv_norm_true_profile["z_grid_phi"] = np.asarray(z_grid[:, 1])
         print("Logging true curvature profile for synthetic data...")
-        curv_norm_true_profile.to_csv(
+        np.savetxt(
             os.path.join(
                 default_config.curvature_profiles_dir,
                 f"{config.results_prefix}_curv_norm_true_profile.csv",
-            )
+            ),
+            np.column_stack(list(curv_norm_true_profile.values())),
+            delimiter=",",
+            header=",".join(curv_norm_true_profile),
+            comments="",
         )
 
     # Plot
@@ -566,28 +586,43 @@ def curvature_compute_plot_log(config, dataset, labels, model):
             labels=labels,
         )
     # Log
+    figs = {"fig_curv_norms_learned": fig_curv_norms_learned}
+    if config.dataset_name in ("s1_synthetic", "s2_synthetic", "t2_synthetic"):
+        figs["fig_curv_norms_true"] = fig_curv_norms_true
+    elif config.dataset_name in ("experimental", "three_place_cells_synthetic"):
+        figs["fig_neural_manifold_learned"] = fig_neural_manifold_learned
+    images = figures_to_wandb_images(figs)
+
     wandb.log(
         {
             "comp_time_curv_learned": comp_time_learned,
-            "average_curv_norms_learned": torch.mean(curv_norms_learned),
-            "std_curv_norms_learned": torch.std(curv_norms_learned),
-            "fig_curv_norms_learned": wandb.Image(fig_curv_norms_learned),
+            "average_curv_norms_learned": float(
+                np.mean(curv_norm_learned_profile["curv_norm_learned"])
+            ),
+            "std_curv_norms_learned": float(
+                np.std(curv_norm_learned_profile["curv_norm_learned"], ddof=1)
+            ),
+            "fig_curv_norms_learned": images["fig_curv_norms_learned"],
         }
     )
     if config.dataset_name in ("s1_synthetic", "s2_synthetic", "t2_synthetic"):
         wandb.log(
             {
                 "comp_time_curv_true": comp_time_true,
-                "average_curv_norms_true": torch.mean(curv_norms_true),
-                "std_curv_norms_true": torch.std(curv_norms_true),
+                "average_curv_norms_true": float(
+                    np.mean(curv_norm_true_profile["curv_norm_true"])
+                ),
+                "std_curv_norms_true": float(
+                    np.std(curv_norm_true_profile["curv_norm_true"], ddof=1)
+                ),
                 "curvature_error": curvature_error,
-                "fig_curv_norms_true": wandb.Image(fig_curv_norms_true),
+                "fig_curv_norms_true": images["fig_curv_norms_true"],
             }
         )
     elif config.dataset_name in ("experimental", "three_place_cells_synthetic"):
         wandb.log(
             {
-                "fig_neural_manifold_learned": wandb.Image(fig_neural_manifold_learned),
+                "fig_neural_manifold_learned": images["fig_neural_manifold_learned"],
             }
         )
     plt.close("all")
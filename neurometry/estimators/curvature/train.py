@@ -8,7 +8,9 @@ import wandb
 import neurometry.curvature.losses as losses
 
 
-def train_test(model, train_loader, test_loader, optimizer, scheduler, config):
+def train_test(
+    model, train_loader, test_loader, optimizer, scheduler, config, epoch_callback=None
+):
     train_losses = []
     test_losses = []
     lowest_test_loss = 1000
@@ -31,11 +33,17 @@ def train_test(model, train_loader, test_loader, optimizer, scheduler, config):
 
         test_losses.append(test_loss)
 
+        if epoch_callback is not None:
+            epoch_callback(epoch, test_loss)
+
         if epoch == 1 or test_loss < lowest_test_loss:
             lowest_test_loss = test_loss
-            best_model = copy.deepcopy(model)
+            best_state_dict = copy.deepcopy(model.state_dict())
 
-    return train_losses, test_losses, best_model
+    # Note: the best weights are loaded back into the model, as a deepcopy
+    # of a compiled model would still run the original module's weights.
+    model.load_state_dict(best_state_dict)
+    return train_losses, test_losses, model
 
 
 def train_one_epoch(epoch, model, train_loader, optimizer, config):
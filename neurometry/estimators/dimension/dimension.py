@@ -3,12 +3,12 @@ import os
 import matplotlib.pyplot as plt
 import numpy as np
 import skdim
+from joblib import Parallel, delayed
 from sklearn.cross_decomposition import PLSRegression
 from sklearn.decomposition import PCA
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
 from sklearn.model_selection import train_test_split
-from sklearn.multioutput import MultiOutputRegressor
 
 import neurometry.datasets.synthetic as synthetic
 
@@ -25,6 +25,8 @@ def skdim_dimension_estimation(
     num_neurons,
     poisson_multiplier=1,
     ref_frequency=200,
+    n_jobs=-1,
+    seed=None,
 ):
     if methods == "all":
         methods = [method for method in dir(skdim.id) if not method.startswith("_")]
@@ -33,12 +35,15 @@ def skdim_dimension_estimation(
 
     noise_level = np.sqrt(1 / (ref_frequency * poisson_multiplier))
 
-    id_estimates = {}
-    for method_name in methods:
-        method = getattr(skdim.id, method_name)()
-        estimates = np.zeros((len(dimensions), num_trials))
-        for dim_idx, dim in enumerate(dimensions):
-            points = point_generator(dim, num_points)
+    # Each trial draws a new neural manifold, shared by all methods.
+    # Note: a given seed reseeds the global (torch) random state of geomstats,
+    # to make the draws, hence the estimates, reproducible across calls.
+    if seed is not None:
+        gs.random.seed(seed)
+    neural_manifolds = {}
+    for dim_idx, dim in enumerate(dimensions):
+        for trial_idx in range(num_trials):
+            points, _ = point_generator(dim, num_points)
             neural_manifold, _ = synthetic.synthetic_neural_manifold(
                 points,
                 num_neurons,
@@ -47,14 +52,38 @@ def skdim_dimension_estimation(
                 ref_frequency,
                 scales=gs.ones(num_neurons),
             )
-            for trial_idx in range(num_trials):
-                method.fit(neural_manifold)
-                estimates[dim_idx, trial_idx] = np.mean(method.dimension_)
-        id_estimates[method_name] = estimates
+            # Convert once, rather than in each fit of each method.
+            neural_manifolds[dim_idx, trial_idx] = gs.to_numpy(neural_manifold)
+
+    # The fits are independent: run them in parallel, each with its own estimator
+    tasks = [
+        (dim_idx, trial_idx, method_name)
+        for dim_idx, trial_idx in neural_manifolds
+        for method_name in methods
+    ]
+    estimates = Parallel(n_jobs=n_jobs)(
+        delayed(_estimate_dimension)(method_name, neural_manifolds[dim_idx, trial_idx])
+        for dim_idx, trial_idx, method_name in tasks
+    )
+
+    id_estimates = {
+        method_name: np.zeros((len(dimensions), num_trials)) for method_name in methods
+    }
+    for (dim_idx, trial_idx, method_name), estimate in zip(
+        tasks, estimates, strict=True
+    ):
+        id_estimates[method_name][dim_idx, trial_idx] = estimate
 
     return id_estimates, noise_level
 
 
+def _estimate_dimension(method_name, neural_manifold):
+    """Fit a new skdim estimator and return its mean dimension estimate."""
+    method = getattr(skdim.id, method_name)()
+    method.fit(neural_manifold)
+    return np.mean(method.dimension_)
+
+
 def plot_dimension_experiments(
     dim_estimates, dimensions, max_id_dim, manifold_type, noise_level
 ):
@@ -137,22 +166,25 @@ def evaluate_pls_with_different_K(X, Y, K_values):
         X, Y, test_size=0.2, random_state=42
     )
 
+    # Fit PLS Regression once with the largest K: the first K components
+    # (and projections) are the same as the ones of a fit with K components
+    pls = PLSRegression(n_components=max(K_values))
+    pls.fit(X_train, Y_train)
+    X_train_pls_full = pls.transform(X_train)
+    X_test_pls_full = pls.transform(X_test)
+    X_pls_full = pls.transform(X)
+
     for K in K_values:
-        # Initialize and fit PLS Regression
-        pls = PLSRegression(n_components=K)
-        pls.fit(X_train, Y_train)
-
-        # Project both training and test data using the PLS model
-        X_train_pls = pls.transform(X_train)
-        X_test_pls = pls.transform(X_test)
-        X_pls = pls.transform(X)
+        # Project both training and test data on the first K PLS components
+        X_train_pls = X_train_pls_full[:, :K]
+        X_test_pls = X_test_pls_full[:, :K]
+        X_pls = X_pls_full[:, :K]
         # projected_X.append(pls.inverse_transform(X_test_pls))
         projected_X.append(X_pls)
 
-        # Fit the Multi-Output Regression model on the reduced data
-        multi_output_reg = MultiOutputRegressor(LinearRegression()).fit(
-            X_train_pls, Y_train
-        )
+        # Fit the Multi-Output Regression model on the reduced data:
+        # LinearRegression fits all outputs at once
+        multi_output_reg = LinearRegression().fit(X_train_pls, Y_train)
 
         # Predict and evaluate using R^2 score
         Y_pred = multi_output_reg.predict(X_test_pls)
@@ -184,22 +216,25 @@ def evaluate_PCA_with_different_K(X, Y, K_values):
         X, Y, test_size=0.2, random_state=42
     )
 
+    # Fit PCA once with the largest K: PCA with K components
+    # keeps the first K principal components of this fit
+    pca = PCA(n_components=max(K_values))
+    pca.fit(X_train)
+    X_train_pca_full = pca.transform(X_train)
+    X_test_pca_full = pca.transform(X_test)
+    X_pca_full = pca.transform(X)
+
     for K in K_values:
-        # Initialize and fit PCA
-        pca = PCA(n_components=K)
-        pca.fit(X_train)
-
-        # Project both training and test data using the PCA model
-        X_train_pca = pca.transform(X_train)
-        X_test_pca = pca.transform(X_test)
-        X_pca = pca.transform(X)
+        # Project both training and test data on the first K principal components
+        X_train_pca = X_train_pca_full[:, :K]
+        X_test_pca = X_test_pca_full[:, :K]
+        X_pca = X_pca_full[:, :K]
         # projected_X.append(pca.inverse_transform(X_test_pca))
         projected_X.append(X_pca)
 
-        # Fit the Multi-Output Regression model on the reduced data
-        multi_output_reg = MultiOutputRegressor(LinearRegression()).fit(
-            X_train_pca, Y_train
-        )
+        # Fit the Multi-Output Regression model on the reduced data:
+        # LinearRegression fits all outputs at once
+        multi_output_reg = LinearRegression().fit(X_train_pca, Y_train)
 
         # Predict and evaluate using R^2 score
         Y_pred = multi_output_reg.predict(X_test_pca)
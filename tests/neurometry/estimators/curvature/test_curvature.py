@@ -1,6 +1,7 @@
 import numpy as np
 import torch
 
+from neurometry.estimators.curvature.evaluate import compute_velocity_stats
 from neurometry.estimators.curvature.losses import latent_regularization_loss
 
 
@@ -24,3 +25,19 @@ def test_latent_regularization_loss():
     print(labels.shape)
     loss = latent_regularization_loss(labels, z, config).numpy()
     assert np.allclose(loss, 0.0)
+
+
+def test_compute_velocity_stats():
+    z_grid = np.array([0.0, np.pi / 2, np.pi, 2 * np.pi])
+    # Angles in degrees: 359 and 1 are within 0.2 rad of both 0 and 2 pi.
+    angles = np.array([359.0, 1.0, 90.0, 91.0])
+    velocities = np.array([1.0, 3.0, 5.0, 7.0])
+    stats = compute_velocity_stats(z_grid, angles, velocities)
+
+    assert np.allclose(stats["mean_velocities"][[0, 1, 3]], [2.0, 6.0, 2.0])
+    assert np.allclose(stats["median_velocities"][[0, 1, 3]], [2.0, 6.0, 2.0])
+    assert np.allclose(stats["std_velocities"][[0, 1, 3]], [1.0, 1.0, 1.0])
+    assert np.allclose(stats["min_velocities"], [1.0, 5.0, -1.0, 1.0])
+    assert np.allclose(stats["max_velocities"], [3.0, 7.0, -1.0, 3.0])
+    # No label is within 0.2 rad of pi.
+    assert np.isnan(stats["mean_velocities"][2])
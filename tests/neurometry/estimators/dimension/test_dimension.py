@@ -0,0 +1,52 @@
+import numpy as np
+from sklearn.cross_decomposition import PLSRegression
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from neurometry.estimators.dimension.dimension import (
+    evaluate_PCA_with_different_K,
+    evaluate_pls_with_different_K,
+)
+
+K_VALUES = [1, 2, 3, 5]
+
+
+def generate_data():
+    rng = np.random.default_rng(seed=0)
+    X = rng.normal(size=(200, 10))
+    Y = X @ rng.normal(size=(10, 2)) + 0.1 * rng.normal(size=(200, 2))
+    return X, Y
+
+
+def refit_r2_scores(X, Y, K_values, decomposition):
+    """Compute the R^2 scores by refitting the decomposition for each K."""
+    X_train, X_test, Y_train, Y_test = train_test_split(
+        X, Y, test_size=0.2, random_state=42
+    )
+    r2_scores = []
+    for K in K_values:
+        model = decomposition(n_components=K).fit(X_train, Y_train)
+        reg = LinearRegression().fit(model.transform(X_train), Y_train)
+        Y_pred = reg.predict(model.transform(X_test))
+        r2_scores.append(r2_score(Y_test, Y_pred, multioutput="uniform_average"))
+    return r2_scores
+
+
+def test_evaluate_PCA_with_different_K_matches_refits():
+    X, Y = generate_data()
+    r2_scores, projected_X = evaluate_PCA_with_different_K(X, Y, K_VALUES)
+    expected_r2_scores = refit_r2_scores(X, Y, K_VALUES, PCA)
+    assert np.allclose(r2_scores, expected_r2_scores)
+    for K, X_pca in zip(K_VALUES, projected_X, strict=True):
+        assert X_pca.shape == (len(X), K)
+
+
+def test_evaluate_pls_with_different_K_matches_refits():
+    X, Y = generate_data()
+    r2_scores, projected_X = evaluate_pls_with_different_K(X, Y, K_VALUES)
+    expected_r2_scores = refit_r2_scores(X, Y, K_VALUES, PLSRegression)
+    assert np.allclose(r2_scores, expected_r2_scores)
+    for K, X_pls in zip(K_VALUES, projected_X, strict=True):
+        assert X_pls.shape == (len(X), K)